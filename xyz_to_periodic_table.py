@@ -22,25 +22,40 @@ Examples:
 from __future__ import annotations
 
 import argparse
+import functools
 import math
 import os
 import tempfile
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-# Avoid matplotlib cache warnings in environments where ~/.matplotlib is not writable.
-_mpl_config = Path(tempfile.gettempdir()) / "matplotlib"
-_mpl_config.mkdir(parents=True, exist_ok=True)
-os.environ.setdefault("MPLCONFIGDIR", str(_mpl_config))
+# Avoid matplotlib cache warnings in environments without a writable config
+# location (e.g. read-only home directories). Skipped when matplotlib will
+# already find a writable config dir among its candidates (XDG path on Linux,
+# ~/.matplotlib elsewhere), so a normal setup pays no import-time mkdir.
+_xdg_config = Path(os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config")
+if "MPLCONFIGDIR" not in os.environ and not any(
+    config_dir.is_dir() and os.access(config_dir, os.W_OK)
+    for config_dir in (_xdg_config / "matplotlib", Path.home() / ".matplotlib")
+):
+    _mpl_config = Path(tempfile.gettempdir()) / "matplotlib"
+    _mpl_config.mkdir(parents=True, exist_ok=True)
+    os.environ["MPLCONFIGDIR"] = str(_mpl_config)
 
-import pandas as pd
-from ase.data import atomic_numbers
-from ase.io import read
-from bokeh.io import output_file, save
-from bokeh.io.export import export_png
-from matplotlib import colormaps
-from matplotlib.colors import to_hex
-from periodic_trends import plotter
+# numpy/pandas/ase/matplotlib/bokeh are imported inside the functions that
+# need them so `--help` and early argument errors do not pay their import cost.
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+@functools.lru_cache(maxsize=1)
+def _element_rank() -> dict[str, int]:
+    """Map element symbols to atomic numbers for sort keys, built once."""
+    from ase.data import chemical_symbols
+
+    return {sym: z for z, sym in enumerate(chemical_symbols)}
 
 
 def parse_frame_option(frame_option: str) -> str | int:
@@ -80,6 +95,8 @@ def parse_highlight_elements(raw_values: list[str] | None) -> list[str]:
 
 
 def normalize_element_symbol(symbol: str) -> str:
+    from ase.data import atomic_numbers
+
     cleaned = symbol.strip()
     if not cleaned:
         raise ValueError("Element symbol cannot be empty.")
@@ -91,6 +108,8 @@ def normalize_element_symbol(symbol: str) -> str:
 
 
 def resolve_cmap(cmap_name: str):
+    from matplotlib import colormaps
+
     normalized = cmap_name.strip()
     if not normalized:
         raise ValueError("--cmap must be a non-empty colormap name.")
@@ -105,6 +124,8 @@ def resolve_cmap(cmap_name: str):
 
 
 def resolve_color(color_value: str, option_name: str) -> str:
+    from matplotlib.colors import to_hex
+
     normalized = color_value.strip()
     if not normalized:
         raise ValueError(f"{option_name} must be a non-empty color.")
@@ -118,6 +139,14 @@ def resolve_color(color_value: str, option_name: str) -> str:
         ) from exc
 
 
+def validate_output_target(output_path: Path, dpi: int) -> None:
+    suffix = output_path.suffix.lower()
+    if suffix not in {".png", ".html"}:
+        raise ValueError("Output extension must be .png or .html")
+    if suffix == ".png" and dpi <= 0:
+        raise ValueError("--dpi must be a positive integer.")
+
+
 def default_csv_output_path(
     output_path: Path, fraction_mode: bool, log_fraction_mode: bool
 ) -> Path:
@@ -131,33 +160,78 @@ def default_csv_output_path(
     return stemmed.parent / f"{stemmed.name}{suffix}"
 
 
-def unique_frames_by_structure_name(frames: list, xyz_path: Path) -> list:
-    seen_structure_names: set[str] = set()
-    unique_frames: list = []
-    missing_name_indices: list[int] = []
+# Below this many atoms, bincount's fresh 119-slot output allocation outweighs
+# the reduction itself; a sparse unique/count update into `hist` wins instead.
+SMALL_FRAME = 128
 
-    for idx, atoms in enumerate(frames):
-        structure_name = atoms.info.get("structure_name")
-        if structure_name is None or str(structure_name).strip() == "":
-            missing_name_indices.append(idx)
-            continue
 
-        key = str(structure_name)
-        if key in seen_structure_names:
-            continue
+def _accumulate_numbers(hist, numbers) -> None:
+    import numpy as np
 
-        seen_structure_names.add(key)
-        unique_frames.append(atoms)
-
-    if missing_name_indices:
-        preview = ", ".join(str(i) for i in missing_name_indices[:10])
-        suffix = " ..." if len(missing_name_indices) > 10 else ""
-        raise ValueError(
-            "--unique-structure requires non-empty info['structure_name'] in every frame. "
-            f"Missing at frame indices: {preview}{suffix} (file: {xyz_path})."
-        )
+    if numbers.size < SMALL_FRAME:
+        ids, id_counts = np.unique(numbers, return_counts=True)
+        # `ids` holds no duplicates, so plain fancy-index addition is exact.
+        hist[ids] += id_counts
+    else:
+        hist += np.bincount(numbers, minlength=hist.size)
+
+
+def _count_xyz_frames(xyz_path: Path) -> int:
+    """Count frames with a plain line scan, without parsing atom data.
+
+    Tokenization deliberately mirrors ASE's reader: anything but an integer
+    where an atom count is expected (including a blank line) raises
+    ValueError, so irregular files fall back to serial counting instead of
+    the scan and the reader silently disagreeing on frame numbering.
+    """
+    n_frames = 0
+    with xyz_path.open(encoding="utf-8", errors="replace") as handle:
+        while True:
+            line = handle.readline()
+            if not line:
+                return n_frames
+            n_atoms = int(line.strip())
+            # Skip the comment line plus one line per atom.
+            for _ in range(n_atoms + 1):
+                handle.readline()
+            n_frames += 1
+
+
+def _count_frame_range(xyz_path_str: str, file_format: str, start: int, stop: int):
+    import numpy as np
+    from ase.data import chemical_symbols
+    from ase.io import iread
+
+    hist = np.zeros(len(chemical_symbols), dtype=np.int64)
+    for atoms in iread(xyz_path_str, index=f"{start}:{stop}", format=file_format):
+        _accumulate_numbers(hist, atoms.numbers)
+    return hist
+
+
+def _element_histogram_parallel(xyz_path: Path, file_format: str, workers: int):
+    """Count frames across worker processes; return None to fall back to serial."""
+    import numpy as np
+    from ase.data import chemical_symbols
 
-    return unique_frames
+    try:
+        total_frames = _count_xyz_frames(xyz_path)
+    except (OSError, ValueError):
+        return None
+    # Process startup outweighs the parse for near-empty chunks.
+    if total_frames < 2 * workers:
+        return None
+
+    bounds = [total_frames * i // workers for i in range(workers + 1)]
+    hist = np.zeros(len(chemical_symbols), dtype=np.int64)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_count_frame_range, str(xyz_path), file_format, start, stop)
+            for start, stop in zip(bounds[:-1], bounds[1:])
+            if stop > start
+        ]
+        for future in futures:
+            hist += future.result()
+    return hist, total_frames
 
 
 def element_counts_from_xyz(
@@ -165,30 +239,117 @@ def element_counts_from_xyz(
     frame_option: str,
     unique_structure: bool = False,
     exclude_elements: list[str] | None = None,
+    workers: int = 1,
+) -> tuple[Counter[str], int, int]:
+    # Counting is deterministic given the file contents, so repeat calls on an
+    # unchanged file (e.g. regenerating plots with new styling) skip the XYZ
+    # parse entirely; mtime/size changes invalidate the cache entry.
+    stat = xyz_path.stat()
+    counts, total_frames, selected_frames = _element_counts_from_xyz_cached(
+        str(xyz_path),
+        stat.st_mtime_ns,
+        stat.st_size,
+        frame_option,
+        unique_structure,
+        tuple(exclude_elements) if exclude_elements else (),
+        workers,
+    )
+    # Hand out a copy so callers mutating the result cannot poison the cache.
+    return Counter(counts), total_frames, selected_frames
+
+
+@functools.lru_cache(maxsize=16)
+def _element_counts_from_xyz_cached(
+    xyz_path_str: str,
+    _st_mtime_ns: int,
+    _st_size: int,
+    frame_option: str,
+    unique_structure: bool,
+    exclude_elements: tuple[str, ...],
+    workers: int,
 ) -> tuple[Counter[str], int, int]:
+    import numpy as np
+    from ase.data import atomic_numbers, chemical_symbols
+    from ase.io import iread
+
+    xyz_path = Path(xyz_path_str)
     index = parse_frame_option(frame_option)
-    atoms_or_list = read(str(xyz_path), index=index)
+    # Passing the format explicitly lets ASE skip content sniffing. The
+    # sniffer maps both .xyz and .extxyz to the extxyz reader (which parses
+    # info from the comment line), so "extxyz" reproduces its dispatch; the
+    # plain "xyz" reader would leave atoms.info empty.
+    file_format = "extxyz"
+
+    # Count atomic numbers in one C-level pass per frame instead of building
+    # Python symbol lists and feeding them through a Counter hash loop.
+    hist = np.zeros(len(chemical_symbols), dtype=np.int64)
+
+    if unique_structure:
+        # Duplicate frames are skipped before counting, so neither they nor
+        # the unique frames are ever held in memory together.
+        seen_structure_names: set[str] = set()
+        missing_name_indices: list[int] = []
+        first_frame_numbers = None
+        total_frames = 0
+        for idx, atoms in enumerate(iread(str(xyz_path), index=index, format=file_format)):
+            total_frames += 1
+            structure_name = atoms.info.get("structure_name")
+            if structure_name is None or str(structure_name).strip() == "":
+                missing_name_indices.append(idx)
+                if idx == 0:
+                    # Single-frame inputs are exempt from the name requirement;
+                    # keep the numbers in case this turns out to be frame 0 of 1.
+                    first_frame_numbers = atoms.numbers.copy()
+                continue
 
-    if isinstance(atoms_or_list, list):
-        frames = atoms_or_list
-    else:
-        frames = [atoms_or_list]
+            key = str(structure_name)
+            if key in seen_structure_names:
+                continue
 
-    total_frames = len(frames)
+            seen_structure_names.add(key)
+            _accumulate_numbers(hist, atoms.numbers)
 
-    if unique_structure and total_frames > 1:
-        frames = unique_frames_by_structure_name(frames, xyz_path)
+        if missing_name_indices and total_frames > 1:
+            preview = ", ".join(str(i) for i in missing_name_indices[:10])
+            suffix = " ..." if len(missing_name_indices) > 10 else ""
+            raise ValueError(
+                "--unique-structure requires non-empty info['structure_name'] in every frame. "
+                f"Missing at frame indices: {preview}{suffix} (file: {xyz_path})."
+            )
 
-    selected_frames = len(frames)
+        if total_frames == 1 and first_frame_numbers is not None:
+            _accumulate_numbers(hist, first_frame_numbers)
+            selected_frames = 1
+        else:
+            selected_frames = len(seen_structure_names)
+    else:
+        # Frame counting is an associative reduction, so full-trajectory reads
+        # can be split across processes and the partial histograms summed.
+        parallel = None
+        if workers > 1 and index == ":":
+            parallel = _element_histogram_parallel(xyz_path, file_format, workers)
+
+        if parallel is not None:
+            hist, total_frames = parallel
+        else:
+            # Streaming keeps peak memory at one frame regardless of trajectory size.
+            total_frames = 0
+            for atoms in iread(str(xyz_path), index=index, format=file_format):
+                _accumulate_numbers(hist, atoms.numbers)
+                total_frames += 1
+        selected_frames = total_frames
 
     exclude_set = set(exclude_elements or [])
-    counts: Counter[str] = Counter()
-    for atoms in frames:
-        counts.update(sym for sym in atoms.get_chemical_symbols() if sym not in exclude_set)
+    for symbol in exclude_set:
+        hist[atomic_numbers[symbol]] = 0
+
+    counts: Counter[str] = Counter(
+        {chemical_symbols[z]: int(hist[z]) for z in np.nonzero(hist)[0]}
+    )
 
     if not counts:
         if exclude_set:
-            excluded = ", ".join(sorted(exclude_set, key=lambda e: atomic_numbers[e]))
+            excluded = ", ".join(sorted(exclude_set, key=_element_rank().__getitem__))
             raise ValueError(
                 f"No atoms left after excluding elements ({excluded}) in '{xyz_path}'."
             )
@@ -198,13 +359,16 @@ def element_counts_from_xyz(
 
 
 def counts_to_dataframe(counts: Counter[str]) -> pd.DataFrame:
-    elements = sorted(counts.keys(), key=lambda e: atomic_numbers.get(e, 999))
-    return pd.DataFrame(
-        {
-            "Element": elements,
-            "element_count": [counts[e] for e in elements],
-        }
-    )
+    import numpy as np
+    import pandas as pd
+
+    # One dict probe per element instead of one per sort comparison, and the
+    # count column is handed to pandas as a ready int64 array.
+    symbols = np.array(list(counts), dtype=object)
+    values = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+    rank = _element_rank()
+    order = np.argsort([rank.get(sym, 999) for sym in symbols], kind="stable")
+    return pd.DataFrame({"Element": symbols[order], "element_count": values[order]})
 
 
 def build_plot_and_csv_data(
@@ -246,6 +410,8 @@ def build_plot_and_csv_data(
 def element_counts_from_csv(
     csv_path: Path, exclude_elements: list[str] | None = None
 ) -> Counter[str]:
+    import pandas as pd
+
     try:
         raw_df = pd.read_csv(csv_path)
     except Exception as exc:
@@ -287,7 +453,7 @@ def element_counts_from_csv(
 
     if df.empty:
         if exclude_set:
-            excluded = ", ".join(sorted(exclude_set, key=lambda e: atomic_numbers[e]))
+            excluded = ", ".join(sorted(exclude_set, key=_element_rank().__getitem__))
             raise ValueError(
                 f"No counts left after excluding elements ({excluded}) in '{csv_path}'."
             )
@@ -296,7 +462,7 @@ def element_counts_from_csv(
     grouped = (
         df.groupby("Element", as_index=False)["element_count"]
         .sum()
-        .sort_values("Element", key=lambda s: s.map(lambda e: atomic_numbers.get(e, 999)))
+        .sort_values("Element", key=lambda s: s.map(_element_rank()))
     )
 
     return Counter(dict(zip(grouped["Element"], grouped["element_count"], strict=False)))
@@ -306,11 +472,9 @@ def export_counts_csv(df: pd.DataFrame, csv_path: Path) -> None:
     df.to_csv(csv_path, index=False)
 
 
-def export_periodic_plot(
+def build_periodic_figure(
     df: pd.DataFrame,
-    output_path: Path,
     title: str | None,
-    dpi: int,
     log_scale: bool,
     exclude_elements: list[str],
     highlight_elements: list[str],
@@ -323,7 +487,9 @@ def export_periodic_plot(
     column_data: str,
     cbar_title: str,
     float_decimals: int,
-) -> None:
+):
+    from periodic_trends import plotter
+
     included_symbols = set(df["Element"].astype(str).tolist())
     no_data_text_color = "#7A7A7A"
 
@@ -475,37 +641,6 @@ def export_periodic_plot(
             glyph.line_width = "line_width"
             return
 
-    special_elements = exclude_elements if exclude_elements else None
-    suffix = output_path.suffix.lower()
-    if suffix == ".html":
-        fig = plotter(
-            df,
-            "Element",
-            column_data,
-            show=False,
-            cmap=cmap,
-            log_scale=log_scale,
-            print_data=print_data,
-            float_decimals=float_decimals,
-            color_min=color_min,
-            color_max=color_max,
-            blank_color=blank_color,
-            special_elements=special_elements,
-            special_color="#FFFFFF",
-            cbar_title=cbar_title,
-            title=title,
-        )
-        apply_element_borders(fig, exclude_elements, highlight_elements)
-        apply_adaptive_text_colors(fig, force_black_text=all_black_text)
-        apply_colorbar_title_style(fig)
-        hide_nan_data_labels(fig)
-        output_file(str(output_path))
-        save(fig)
-        return
-
-    if suffix != ".png":
-        raise ValueError("Output extension must be .png or .html")
-
     fig = plotter(
         df,
         "Element",
@@ -518,7 +653,7 @@ def export_periodic_plot(
         color_min=color_min,
         color_max=color_max,
         blank_color=blank_color,
-        special_elements=special_elements,
+        special_elements=exclude_elements if exclude_elements else None,
         special_color="#FFFFFF",
         cbar_title=cbar_title,
         title=title,
@@ -527,13 +662,25 @@ def export_periodic_plot(
     apply_adaptive_text_colors(fig, force_black_text=all_black_text)
     apply_colorbar_title_style(fig)
     hide_nan_data_labels(fig)
+    return fig
 
-    if dpi <= 0:
-        raise ValueError("--dpi must be a positive integer.")
+
+def save_periodic_figure(fig, output_path: Path, dpi: int) -> None:
+    from bokeh.io import output_file, save
+
+    validate_output_target(output_path, dpi)
+
+    suffix = output_path.suffix.lower()
+    if suffix == ".html":
+        output_file(str(output_path))
+        save(fig)
+        return
 
     # Bokeh renderers are CSS-pixel based; 96 dpi is the browser baseline.
     scale_factor = dpi / 96.0
     try:
+        from bokeh.io.export import export_png
+
         export_png(fig, filename=str(output_path), scale_factor=scale_factor)
     except Exception as exc:
         raise RuntimeError(
@@ -567,6 +714,15 @@ def build_parser() -> argparse.ArgumentParser:
             "info['structure_name']."
         ),
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=(
+            "Number of processes for counting multi-frame XYZ input with "
+            "--frame all (default: 1)."
+        ),
+    )
     parser.add_argument(
         "--title",
         default="Element Counts",
@@ -696,6 +852,12 @@ def main() -> int:
             and args.color_min >= args.color_max
         ):
             raise ValueError("--color-min must be smaller than --color-max.")
+        if args.workers < 1:
+            raise ValueError("--workers must be a positive integer.")
+        # Reject output typos before the (potentially huge) input is parsed.
+        validate_output_target(args.output, args.dpi)
+        if args.save_html is not None:
+            validate_output_target(args.save_html, args.dpi)
 
         is_csv_input = args.input_data.suffix.lower() == ".csv"
         if is_csv_input:
@@ -715,6 +877,7 @@ def main() -> int:
                 args.frame,
                 unique_structure=args.unique_structure,
                 exclude_elements=exclude_elements,
+                workers=args.workers,
             )
         plot_df, csv_df, column_data, cbar_title, float_decimals = build_plot_and_csv_data(
             counts, fraction_mode=args.fraction, log_fraction_mode=args.log_fraction
@@ -725,11 +888,10 @@ def main() -> int:
         )
         export_counts_csv(csv_df, csv_output_path)
 
-        export_periodic_plot(
+        # Build the Bokeh figure once and reuse it for every output sink.
+        fig = build_periodic_figure(
             plot_df,
-            args.output,
             title=args.title,
-            dpi=args.dpi,
             log_scale=args.log_scale,
             exclude_elements=exclude_elements,
             highlight_elements=highlight_elements,
@@ -743,26 +905,10 @@ def main() -> int:
             cbar_title=cbar_title,
             float_decimals=float_decimals,
         )
+        save_periodic_figure(fig, args.output, dpi=args.dpi)
 
         if args.save_html is not None:
-            export_periodic_plot(
-                plot_df,
-                args.save_html,
-                title=args.title,
-                dpi=args.dpi,
-                log_scale=args.log_scale,
-                exclude_elements=exclude_elements,
-                highlight_elements=highlight_elements,
-                cmap=cmap,
-                blank_color=blank_color,
-                print_data=args.print_data,
-                all_black_text=args.all_black_text,
-                color_min=args.color_min,
-                color_max=args.color_max,
-                column_data=column_data,
-                cbar_title=cbar_title,
-                float_decimals=float_decimals,
-            )
+            save_periodic_figure(fig, args.save_html, dpi=args.dpi)
 
         if args.unique_structure:
             print(
@@ -793,8 +939,9 @@ def main() -> int:
             )
 
         print("Element counts:")
-        for element, n in sorted(
-            counts.items(), key=lambda x: atomic_numbers.get(x[0], 999)
+        # csv_df rows are already in atomic-number order; no need to re-sort.
+        for element, n in zip(
+            csv_df["Element"].to_numpy(), csv_df["element_count"].to_numpy()
         ):
             print(f"  {element}: {n}")
 